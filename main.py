@@ -3,8 +3,12 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 from src.validate_nasch import validate_nasch_model
 from src.visualize_nasch import run_full_visualization
-from src.data_loader import read_nasch_params
-from src.config import DENSITY, LANES
+from src.data_loader import read_nasch_params, load_exid_inflow
+from src.exid_replay import load_replay
+from src.export_nasch import export_simulation
+from src.nasch_core import init_boundary
+from src.config import (DENSITY, LANES, REPLAY_REC_ID, EXID_DATA_DIR, BOUNDARY, INFLOW_REC_ID, INFLOW_EDGE_M,
+                        DRIVING_DIRECTION, TIME_STEP_S, EXID_FRAME_RATE, EXPORT_DIR, EXPORT_STEPS, L)
 
 CALIBRATION_FILE = './data/nasch_calibration_summary.csv'
 
@@ -15,8 +19,24 @@ def main():
     if LANES == 1:
         validate_nasch_model(v_max, p)
 
+    replay = None
+    if REPLAY_REC_ID is not None:
+        print("\n=== ODTWARZANIE EXID ===")
+        replay = load_replay(EXID_DATA_DIR, REPLAY_REC_ID)
+
+    arrivals = None
+    if BOUNDARY == 'open' and INFLOW_REC_ID is not None:
+        print("\n=== NAPŁYW Z DANYCH EXID ===")
+        arrivals = load_exid_inflow(EXID_DATA_DIR, INFLOW_REC_ID, TIME_STEP_S, EXID_FRAME_RATE,
+                                    DRIVING_DIRECTION, INFLOW_EDGE_M)
+
+    if EXPORT_DIR is not None:
+        print("\n=== EKSPORT PRZEBIEGU ===")
+        boundary = init_boundary(L, LANES, arrivals=arrivals) if BOUNDARY == 'open' else None
+        export_simulation(EXPORT_DIR, EXPORT_STEPS, L, DENSITY, v_max, p, boundary=boundary)
+
     print("\n=== SYMULACJA ===")
-    run_full_visualization(v_max, p, density=DENSITY)
+    run_full_visualization(v_max, p, density=DENSITY, replay=replay, arrivals=arrivals)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -7,4 +7,24 @@ DENSITY = 0.15           # Początkowa gęstość zaludnienia drogi (prawdopodob
 
 P_CHANGE = 0.6           # Prawdopodobieństwo, że kierowca podejmie decyzję o zmianie pasa, gdy warunki są sprzyjające [0.0 - 1.0]
 V_STRAT = 1.0            # Wymagana motywacja do zmiany pasa (minimalna strata prędkości) [komórki/krok]
-GAP_REAR = 2             # Minimalny bezpieczny odstęp (bufor) za pojazdem zmieniającym pas [komórki]
\ No newline at end of file
+GAP_REAR = 2             # Minimalny bezpieczny odstęp (bufor) za pojazdem zmieniającym pas [komórki]
+REPLAY_REC_ID = None     # ID nagrania ExiD odtwarzanego obok symulacji, np. "00" (None = odtwarzanie wyłączone)
+EXID_DATA_DIR = 'data/data/'  # Katalog z plikami ExiD używanymi do odtwarzania i napływu z danych
+REPLAY_FPS = 60          # Docelowa liczba klatek na sekundę przy odtwarzaniu trajektorii
+DRIVING_DIRECTION = 1    # Kierunek jazdy brany z nagrań ExiD: 1 = zgodnie z osią drogi, -1 = przeciwnie
+
+BOUNDARY = 'periodic'    # Warunek brzegowy: 'periodic' (pierścień) lub 'open' (otwarty korytarz z wjazdem i wyjazdem)
+INFLOW_RATE = 0.3        # Średnia liczba pojazdów wjeżdżających na początek korytarza w jednym kroku (rozkład Poissona)
+INFLOW_REC_ID = None     # ID nagrania ExiD, z którego brany jest napływ na początek korytarza (None = rozkład Poissona)
+INFLOW_EDGE_M = 30.0     # Pojazdy pojawiające się w nagraniu bliżej niż tyle metrów od górnej krawędzi liczą się jako napływ [m]
+INFLOW_DATA_END = 'loop' # Zachowanie po wyczerpaniu napływu z danych: 'loop' (od początku) lub 'poisson' (INFLOW_RATE)
+ON_RAMPS = []            # Wjazdy na drogę: lista (komórka, średnia liczba pojazdów na krok), np. [(40, 0.1)]
+OFF_RAMPS = []           # Zjazdy z drogi: lista (komórka, prawdopodobieństwo zjazdu pojazdu), np. [(90, 0.2)]
+RAMP_LANE = 0            # Pas, z którego odbywa się wjazd i zjazd (skrajny pas)
+EXIT_LOG_SIZE = 10000    # Pojemność bufora cyklicznego z pojazdami opuszczającymi korytarz
+EXID_FRAME_RATE = 25     # Częstotliwość klatek nagrań ExiD [Hz]
+
+EXPORT_DIR = None        # Katalog eksportu agregatów długiego przebiegu, np. './data/export' (None = bez eksportu)
+EXPORT_STEPS = 100000    # Liczba kroków eksportowanego przebiegu
+EXPORT_CHUNK_STEPS = 1000  # Liczba kroków symulacji zapisywana w jednym skompresowanym bloku eksportu
+EXPORT_SEGMENT_CELLS = None  # Długość segmentu [komórki] dla eksportu pola prędkości (None = bez pola prędkości)
@@ -68,4 +68,114 @@ def read_nasch_params(filename):
         return 10, 0.2
     except Exception as e:
         print(f"Wystąpił nieoczekiwany błąd podczas wczytywania pliku: {e}")
-        return 10, 0.2
\ No newline at end of file
+        return 10, 0.2
+
+def load_exid_columns(data_dir, rec_id, columns):
+    """
+    Ładuje z pliku trajektorii ExiD wyłącznie wskazane kolumny.
+
+    Args:
+        data_dir (str): Katalog z plikami ExiD.
+        rec_id (str): ID nagrania (np. "00").
+        columns (list[str]): Lista wczytywanych kolumn.
+
+    Returns:
+        pd.DataFrame | None: Dane trajektorii lub None, jeśli pliku nie znaleziono.
+    """
+    tracks_path = f'{data_dir}{rec_id}_tracks.csv'
+
+    try:
+        tracks = pd.read_csv(tracks_path, usecols=columns, low_memory=False)
+        print(f"Załadowano kolumny nagrania ID: {rec_id}. Wierszy: {len(tracks)}")
+        return tracks
+    except FileNotFoundError:
+        print(f"Ostrzeżenie: Nie znaleziono pliku trajektorii dla nagrania ID: {rec_id}.")
+    except ValueError as e:
+        print(f"Ostrzeżenie: Błąd kolumny w nagraniu ID: {rec_id}: {e}.")
+    return None
+
+
+def add_station_coordinate(tracks, direction):
+    """
+    Wyznacza wspólną współrzędną podłużną (kilometraż) pojazdów jednego kierunku jazdy.
+
+    Oś drogi to główny kierunek rozrzutu pozycji (xCenter, yCenter) w nagraniu.
+    Pozycje rzutowane są na tę oś, a kierunek jazdy pojazdu wyznacza średni
+    rzut jego prędkości (xVelocity, yVelocity) na oś.
+
+    Args:
+        tracks (pd.DataFrame): Trajektorie jednego nagrania (kolumny 'trackId',
+            'xCenter', 'yCenter', 'xVelocity', 'yVelocity').
+        direction (int): Kierunek jazdy: 1 = zgodnie z osią drogi, -1 = przeciwnie.
+
+    Returns:
+        pd.DataFrame: Wiersze pojazdów wybranego kierunku z kolumną 'station' [m],
+                      rosnącą w kierunku jazdy i równą 0 na górnej krawędzi nagrania.
+    """
+    xy = tracks[['xCenter', 'yCenter']].to_numpy()
+    _, eigenvectors = np.linalg.eigh(np.cov(xy, rowvar=False))
+    axis = eigenvectors[:, -1]
+    if axis[0] < 0:
+        axis = -axis  # jednoznaczny zwrot osi
+
+    along = tracks['xVelocity'].to_numpy() * axis[0] + tracks['yVelocity'].to_numpy() * axis[1]
+    track_direction = pd.Series(along, index=tracks.index).groupby(tracks['trackId']).transform('mean')
+    tracks = tracks[track_direction.to_numpy() * direction > 0].copy()
+
+    station = direction * (tracks[['xCenter', 'yCenter']].to_numpy() @ axis)
+    tracks['station'] = station - station.min() if len(station) else station
+    return tracks
+
+
+def inflow_from_tracks(tracks, time_step, frame_rate, edge_m):
+    """
+    Wyznacza liczbę pojazdów wjeżdżających na górną krawędź nagrania w kolejnych krokach symulacji.
+
+    Liczone są tylko pojazdy, które pojawiają się w nagraniu bliżej niż edge_m
+    od górnej krawędzi; pojazdy z wjazdów pojawiają się dalej i są pomijane.
+
+    Args:
+        tracks (pd.DataFrame): Trajektorie jednego kierunku jazdy z kolumną 'station'
+            (wynik add_station_coordinate) oraz kolumnami 'trackId' i 'frame'.
+        time_step (float): Krok czasowy symulacji [s].
+        frame_rate (float): Częstotliwość klatek nagrania [Hz].
+        edge_m (float): Szerokość strefy przy górnej krawędzi nagrania [m].
+
+    Returns:
+        np.ndarray: Liczba nowych pojazdów w każdym kroku symulacji.
+    """
+    first_rows = tracks.loc[tracks.groupby('trackId')['frame'].idxmin()]
+    first_rows = first_rows[first_rows['station'] < edge_m]
+
+    frames = first_rows['frame'].to_numpy() - tracks['frame'].min()
+    steps = (frames / frame_rate / time_step).astype(int)
+    n_steps = int((tracks['frame'].max() - tracks['frame'].min()) / frame_rate / time_step) + 1
+    return np.bincount(steps, minlength=n_steps)
+
+
+def load_exid_inflow(data_dir, rec_id, time_step, frame_rate, direction, edge_m):
+    """
+    Wczytuje nagranie ExiD i wyznacza z niego napływ pojazdów na początek korytarza.
+
+    Args:
+        data_dir (str): Katalog z plikami ExiD.
+        rec_id (str): ID nagrania (np. "00").
+        time_step (float): Krok czasowy symulacji [s].
+        frame_rate (float): Częstotliwość klatek nagrania [Hz].
+        direction (int): Kierunek jazdy: 1 = zgodnie z osią drogi, -1 = przeciwnie.
+        edge_m (float): Szerokość strefy przy górnej krawędzi nagrania [m].
+
+    Returns:
+        np.ndarray | None: Liczba przyjazdów w kolejnych krokach lub None, jeśli nie udało się wczytać danych.
+    """
+    columns = ['trackId', 'frame', 'xCenter', 'yCenter', 'xVelocity', 'yVelocity']
+    tracks = load_exid_columns(data_dir, rec_id, columns)
+    if tracks is None or tracks.empty:
+        return None
+
+    tracks = add_station_coordinate(tracks, direction)
+    if tracks.empty:
+        return None
+    arrivals = inflow_from_tracks(tracks, time_step, frame_rate, edge_m)
+    print(f"Napływ z nagrania ID: {rec_id}: {arrivals.sum()} pojazdów w {len(arrivals)} krokach.")
+    return arrivals
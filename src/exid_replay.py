@@ -0,0 +1,84 @@
+import numpy as np
+
+from src.config import CELL_LENGTH_M, TIME_STEP_S, L, DRIVING_DIRECTION
+from src.data_loader import load_exid_columns, add_station_coordinate
+
+# Kolumny ExiD potrzebne do odtwarzania - pozostałe nie są w ogóle wczytywane
+REPLAY_COLUMNS = ['trackId', 'frame', 'xCenter', 'yCenter', 'xVelocity', 'yVelocity', 'lonVelocity']
+
+
+def build_frame_index(tracks, length=L, cell_length=CELL_LENGTH_M, time_step=TIME_STEP_S):
+    """Buduje indeks klatka -> zakres wierszy na posortowanych danych kolumnowych.
+
+    Dane są jednorazowo sortowane po numerze klatki, a kilometraż i prędkości
+    przeliczane na komórki i jednostki NaSch. Indeks obejmuje każdą klatkę
+    od pierwszej do ostatniej, więc pojedyncza klatka to wycinek (widok)
+    tablic wyznaczany w czasie O(1), bez filtrowania DataFrame.
+
+    Args:
+        tracks (pd.DataFrame): Trajektorie z kolumnami 'frame', 'station' i 'lonVelocity'.
+        length (int): Długość drogi w komórkach; pojazdy poza nią są pomijane.
+        cell_length (float): Długość jednej komórki [m].
+        time_step (float): Krok czasowy symulacji [s].
+
+    Returns:
+        dict: Indeks z numerem pierwszej klatki 'first_frame', tablicami 'starts'
+              i 'ends' (zakres wierszy każdej klatki) oraz 'cells' i 'speeds'
+              (dane posortowane po klatkach).
+    """
+    frames = tracks['frame'].to_numpy()
+    order = np.argsort(frames, kind='stable')
+    frames = frames[order]
+
+    cells = np.floor(tracks['station'].to_numpy()[order] / cell_length).astype(np.int32)
+    speeds = (tracks['lonVelocity'].to_numpy()[order] * time_step / cell_length).astype(np.float32)
+
+    # Odrzucenie pojazdów poza symulowanym odcinkiem drogi
+    on_road = (cells >= 0) & (cells < length)
+    frames, cells, speeds = frames[on_road], cells[on_road], speeds[on_road]
+
+    all_frames = np.arange(frames.min(), frames.max() + 1) if len(frames) else np.zeros(0, dtype=int)
+    return {
+        'first_frame': int(all_frames[0]) if len(all_frames) else 0,
+        'starts': np.searchsorted(frames, all_frames, side='left'),
+        'ends': np.searchsorted(frames, all_frames, side='right'),
+        'cells': cells,
+        'speeds': speeds,
+    }
+
+
+def get_frame(index, i):
+    """Zwraca dane i-tej klatki indeksu (liczonej od pierwszej klatki nagrania).
+
+    Args:
+        index (dict): Indeks zbudowany przez build_frame_index.
+        i (int): Numer kolejny klatki w indeksie.
+
+    Returns:
+        tuple: (numer klatki ExiD, tablica komórek, tablica prędkości NaSch)
+    """
+    start, end = index['starts'][i], index['ends'][i]
+    return index['first_frame'] + i, index['cells'][start:end], index['speeds'][start:end]
+
+
+def load_replay(data_dir, rec_id, direction=DRIVING_DIRECTION):
+    """Wczytuje nagranie ExiD i buduje indeks klatek do wizualizacji.
+
+    Args:
+        data_dir (str): Katalog z plikami ExiD.
+        rec_id (str): ID nagrania (np. "00").
+        direction (int): Odtwarzany kierunek jazdy (1 lub -1).
+
+    Returns:
+        dict | None: Indeks klatek lub None, jeśli nie udało się wczytać danych.
+    """
+    tracks = load_exid_columns(data_dir, rec_id, REPLAY_COLUMNS)
+    if tracks is None or tracks.empty:
+        return None
+
+    index = build_frame_index(add_station_coordinate(tracks, direction))
+    if len(index['starts']) == 0:
+        print(f"Ostrzeżenie: Brak pojazdów do odtworzenia w nagraniu ID: {rec_id}.")
+        return None
+    print(f"Zbudowano indeks odtwarzania: {len(index['starts'])} klatek.")
+    return index
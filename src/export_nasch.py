@@ -0,0 +1,289 @@
+import os
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.config import EXPORT_CHUNK_STEPS, EXPORT_SEGMENT_CELLS, LANES
+from src.nasch_core import run_simulation
+
+MANIFEST_FILE = 'manifest.csv'
+LANE_COLUMNS = ['cars', 'mean_speed', 'stopped', 'lane_changes']
+
+
+def _new_chunk(chunk_steps, n_lanes, n_segments):
+    """Alokuje bufory jednego bloku eksportu."""
+    chunk = {
+        'step': np.zeros(chunk_steps, dtype=np.int64),
+        'cars': np.zeros((chunk_steps, n_lanes), dtype=np.int32),
+        'mean_speed': np.zeros((chunk_steps, n_lanes), dtype=np.float32),
+        'stopped': np.zeros((chunk_steps, n_lanes), dtype=np.int32),
+        'lane_changes': np.zeros((chunk_steps, n_lanes), dtype=np.int32),
+    }
+    if n_segments:
+        chunk['segment_speed'] = np.zeros((chunk_steps, n_lanes, n_segments), dtype=np.float32)
+    return chunk
+
+
+def _writer(export):
+    """Wątek zapisujący bloki na dysk i dopisujący je do manifestu.
+
+    Błąd zapisu jest zapamiętywany w export['error'] i zgłaszany ponownie
+    przez record_step / close_export; wątek kończy wtedy pracę.
+    """
+    manifest_path = os.path.join(export['dir'], MANIFEST_FILE)
+    while True:
+        item = export['queue'].get()
+        if item is None:
+            return
+        chunk_id, arrays = item
+        filename = f'chunk_{chunk_id:05d}.npz'
+        try:
+            np.savez_compressed(os.path.join(export['dir'], filename), **arrays)
+            with open(manifest_path, 'a') as f:
+                f.write(f"{chunk_id},{filename},{arrays['step'][0]},{arrays['step'][-1]},{export['n_segments']}\n")
+        except Exception as e:
+            export['error'] = e
+            return
+
+
+def _raise_writer_error(export):
+    """Zgłasza w wątku symulacji błąd, który wystąpił w wątku zapisującym."""
+    if export['error'] is not None:
+        raise RuntimeError(f"Błąd zapisu eksportu do katalogu {export['dir']}") from export['error']
+
+
+def open_export(export_dir, n_lanes, length, chunk_steps=EXPORT_CHUNK_STEPS, segment_cells=EXPORT_SEGMENT_CELLS):
+    """Otwiera eksport agregatów symulacji do skompresowanych bloków kolumnowych.
+
+    Agregaty z kolejnych kroków trafiają do buforów w pamięci; pełny blok
+    przekazywany jest do wątku w tle, który zapisuje go jako plik .npz
+    (każda kolumna kompresowana osobno) i dopisuje jego zakres kroków do
+    manifestu. Pętla symulacji nie czeka na zapis na dysk.
+
+    Args:
+        export_dir (str): Katalog docelowy eksportu.
+        n_lanes (int): Liczba pasów.
+        length (int): Długość drogi w komórkach.
+        chunk_steps (int): Liczba kroków w jednym bloku.
+        segment_cells (int, optional): Długość segmentu dla pola prędkości [komórki];
+            None wyłącza eksport pola prędkości.
+
+    Returns:
+        dict: Stan eksportu przekazywany do record_step i close_export.
+
+    Raises:
+        RuntimeError: Zgłaszany przez record_step i close_export, gdy zapis bloku się nie powiódł.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    with open(os.path.join(export_dir, MANIFEST_FILE), 'w') as f:
+        f.write("chunk,file,step_start,step_end,n_segments\n")
+
+    n_segments = -(-length // segment_cells) if segment_cells else 0
+    export = {
+        'dir': export_dir,
+        'chunk_steps': chunk_steps,
+        'n_lanes': n_lanes,
+        'segment_cells': segment_cells,
+        'n_segments': n_segments,
+        'chunk': _new_chunk(chunk_steps, n_lanes, n_segments),
+        'chunk_id': 0,
+        'row': 0,
+        'step': 0,
+        'queue': queue.Queue(),
+        'error': None,
+    }
+    export['thread'] = threading.Thread(target=_writer, args=(export,), daemon=True)
+    export['thread'].start()
+    return export
+
+
+def _submit_chunk(export):
+    """Przekazuje wypełnioną część bieżącego bloku do wątku zapisującego."""
+    rows = export['row']
+    if rows == 0:
+        return
+    arrays = {name: values[:rows] for name, values in export['chunk'].items()}
+    export['queue'].put((export['chunk_id'], arrays))
+    export['chunk_id'] += 1
+    export['chunk'] = _new_chunk(export['chunk_steps'], export['n_lanes'], export['n_segments'])
+    export['row'] = 0
+
+
+def record_step(export, road, lane_changes):
+    """Zapisuje agregaty jednego kroku symulacji dla każdego pasa.
+
+    Args:
+        export (dict): Stan eksportu z open_export.
+        road (list[list]): Stan drogi [pas][pozycja] po kroku.
+        lane_changes (list[int]): Liczba zmian pasa wykonanych z każdego pasa.
+    """
+    _raise_writer_error(export)
+    chunk = export['chunk']
+    row = export['row']
+    segment_cells = export['segment_cells']
+    n_segments = export['n_segments']
+
+    chunk['step'][row] = export['step']
+    for lane_idx, lane in enumerate(road):
+        cars = 0
+        stopped = 0
+        speed_sum = 0
+        if n_segments:
+            seg_sum = [0] * n_segments
+            seg_count = [0] * n_segments
+        for i, v in enumerate(lane):
+            if v is not None:
+                cars += 1
+                speed_sum += v
+                if v == 0:
+                    stopped += 1
+                if n_segments:
+                    seg_sum[i // segment_cells] += v
+                    seg_count[i // segment_cells] += 1
+
+        chunk['cars'][row, lane_idx] = cars
+        chunk['mean_speed'][row, lane_idx] = speed_sum / cars if cars else np.nan
+        chunk['stopped'][row, lane_idx] = stopped
+        chunk['lane_changes'][row, lane_idx] = lane_changes[lane_idx]
+        if n_segments:
+            chunk['segment_speed'][row, lane_idx] = [
+                s / c if c else np.nan for s, c in zip(seg_sum, seg_count)
+            ]
+
+    export['row'] += 1
+    export['step'] += 1
+    if export['row'] == export['chunk_steps']:
+        _submit_chunk(export)
+
+
+def _stop_writer(export):
+    """Przekazuje ostatni niepełny blok i czeka na zakończenie wątku zapisującego."""
+    _submit_chunk(export)
+    export['queue'].put(None)
+    export['thread'].join()
+
+
+def close_export(export):
+    """Zapisuje ostatni niepełny blok i czeka na zakończenie wątku zapisującego.
+
+    Args:
+        export (dict): Stan eksportu z open_export.
+    """
+    _stop_writer(export)
+    _raise_writer_error(export)
+    print(f"Zapisano eksport symulacji ({export['step']} kroków) do katalogu: {export['dir']}")
+
+
+def export_simulation(export_dir, steps, length, density, v_max, p, boundary=None):
+    """Uruchamia symulację bez zapamiętywania historii i eksportuje agregaty każdego kroku.
+
+    Args:
+        export_dir (str): Katalog docelowy eksportu.
+        steps (int): Liczba kroków symulacji.
+        length (int): Długość drogi w komórkach.
+        density (float): Początkowa gęstość pojazdów.
+        v_max (int): Maksymalna prędkość.
+        p (float): Prawdopodobieństwo spowolnienia.
+        boundary (dict, optional): Stan otwartych brzegów z init_boundary (None = pierścień).
+
+    Returns:
+        list: Przepływy w kolejnych krokach.
+    """
+    export = open_export(export_dir, LANES, length)
+    try:
+        _, point_flows = run_simulation(
+            steps, length, density, v_max, p, boundary=boundary,
+            on_step=lambda road, stats: record_step(export, road, stats['lane_changes']),
+            keep_history=False,
+        )
+    except BaseException:
+        # zamknięcie bez komunikatu i bez ponownego zgłaszania błędu zapisu - propaguje się już wyjątek
+        _stop_writer(export)
+        raise
+    close_export(export)
+    return point_flows
+
+
+def _read_manifest(export_dir):
+    """Wczytuje manifest eksportu posortowany po numerach bloków."""
+    return pd.read_csv(os.path.join(export_dir, MANIFEST_FILE)).sort_values('chunk')
+
+
+def _load_window(export_dir, columns, step_start, step_end, manifest=None):
+    """Wczytuje wskazane kolumny tylko z bloków pokrywających okno kroków."""
+    if manifest is None:
+        manifest = _read_manifest(export_dir)
+    if step_start is not None:
+        manifest = manifest[manifest['step_end'] >= step_start]
+    if step_end is not None:
+        manifest = manifest[manifest['step_start'] < step_end]
+
+    parts = {name: [] for name in ['step'] + columns}
+    for filename in manifest['file']:
+        with np.load(os.path.join(export_dir, filename)) as data:
+            steps = data['step']
+            mask = np.ones(len(steps), dtype=bool)
+            if step_start is not None:
+                mask &= steps >= step_start
+            if step_end is not None:
+                mask &= steps < step_end
+            parts['step'].append(steps[mask])
+            for name in columns:
+                parts[name].append(data[name][mask])
+
+    if not parts['step']:
+        return None
+    return {name: np.concatenate(values) for name, values in parts.items()}
+
+
+def read_export(export_dir, step_start=None, step_end=None):
+    """Odczytuje agregaty pasów z okna kroków [step_start, step_end).
+
+    Dekompresowane są wyłącznie bloki pokrywające okno i wyłącznie kolumny agregatów.
+
+    Args:
+        export_dir (str): Katalog eksportu.
+        step_start (int, optional): Pierwszy krok okna (None = od początku).
+        step_end (int, optional): Krok kończący okno, wyłącznie (None = do końca).
+
+    Returns:
+        pd.DataFrame: Kolumny step, lane, cars, mean_speed, stopped, lane_changes.
+    """
+    data = _load_window(export_dir, LANE_COLUMNS, step_start, step_end)
+    if data is None:
+        return pd.DataFrame(columns=['step', 'lane'] + LANE_COLUMNS)
+
+    n_steps, n_lanes = data['cars'].shape
+    result = {
+        'step': np.repeat(data['step'], n_lanes),
+        'lane': np.tile(np.arange(n_lanes), n_steps),
+    }
+    for name in LANE_COLUMNS:
+        result[name] = data[name].reshape(-1)
+    return pd.DataFrame(result)
+
+
+def read_segment_speeds(export_dir, step_start=None, step_end=None):
+    """Odczytuje pole prędkości w segmentach z okna kroków [step_start, step_end).
+
+    Args:
+        export_dir (str): Katalog eksportu.
+        step_start (int, optional): Pierwszy krok okna (None = od początku).
+        step_end (int, optional): Krok kończący okno, wyłącznie (None = do końca).
+
+    Returns:
+        tuple: (tablica kroków, tablica prędkości [krok][pas][segment], NaN = pusty segment)
+
+    Raises:
+        ValueError: Gdy eksport zapisano bez pola prędkości (segment_cells=None).
+    """
+    manifest = _read_manifest(export_dir)
+    if (manifest['n_segments'] == 0).any():
+        raise ValueError(f"Eksport w katalogu {export_dir} nie zawiera pola prędkości w segmentach "
+                         "(zapisano go z segment_cells=None)")
+    data = _load_window(export_dir, ['segment_speed'], step_start, step_end, manifest)
+    if data is None:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0, 0), dtype=np.float32)
+    return data['step'], data['segment_speed']
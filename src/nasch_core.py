@@ -1,7 +1,11 @@
+import math
 import random 
+from collections import deque
+
 import numpy as np
 
-from src.config import P_CHANGE, V_STRAT, GAP_REAR, LANES
+from src.config import (P_CHANGE, V_STRAT, GAP_REAR, LANES, INFLOW_RATE, ON_RAMPS, OFF_RAMPS,
+                        RAMP_LANE, EXIT_LOG_SIZE, INFLOW_DATA_END)
 
 def init_road(length, density, n_lanes=2):
     """Inicjalizuje wielopasmową drogę.
@@ -26,12 +30,14 @@ def init_road(length, density, n_lanes=2):
     return road
 
 
-def distance_to_next(road, position):
+def distance_to_next(road, position, periodic=True):
     """Oblicza odległość do najbliższego samochodu z przodu.
     
     Args:
         road (list): Lista reprezentująca stan drogi.
         position (int): Indeks pozycji pojazdu.
+        periodic (bool): Czy droga jest pierścieniem; na otwartej drodze
+            za jej końcem nie ma przeszkód.
     
     Returns:
         int: Liczba wolnych komórek do następnego pojazdu.
@@ -39,14 +45,18 @@ def distance_to_next(road, position):
     length = len(road)
     distance = 1
     while distance < length:
-        next_pos = (position + distance) % length
+        next_pos = position + distance
+        if next_pos >= length:
+            if not periodic:
+                return length
+            next_pos %= length
         if road[next_pos] is not None:
             return distance
         distance += 1
     return length
 
 
-def update_speeds(road, v_max, p):
+def update_speeds(road, v_max, p, periodic=True):
     """Aktualizuje prędkości wszystkich pojazdów według reguł NaSch.
     
     Reguły:
@@ -58,6 +68,7 @@ def update_speeds(road, v_max, p):
         road (list): Lista prędkości (lub None).
         v_max (int): Maksymalna prędkość (w komórkach/krok).
         p (float): Prawdopodobieństwo losowego spowolnienia.
+        periodic (bool): Czy droga jest pierścieniem.
     
     Returns:
         list: Zaktualizowany stan drogi (z nowymi prędkościami).
@@ -69,7 +80,7 @@ def update_speeds(road, v_max, p):
             v = road[i]
             if v < v_max:
                 v += 1
-            gap = distance_to_next(road, i)
+            gap = distance_to_next(road, i, periodic)
             v = min(v, gap - 1)
             if v > 0 and random.random() < p:
                 v -= 1
@@ -100,7 +111,143 @@ def move_cars(road):
     return new_road, flow_count
 
 
-def change_lane(road, lane, pos, v_max, p_change, v_strat_nasch, gap_rear_nasch):
+def move_cars_open(road, off_ramps=()):
+    """Przesuwa samochody na otwartym odcinku drogi, usuwając pojazdy na wyjeździe i zjazdach.
+    
+    Args:
+        road (list): Lista prędkości pojazdów (lub None).
+        off_ramps (list[tuple]): Zjazdy jako pary (komórka, prawdopodobieństwo zjazdu).
+    
+    Returns:
+        tuple: (nowy stan drogi, liczba samochodów, które opuściły koniec drogi,
+                liczba samochodów, które skorzystały ze zjazdu)
+    """
+    length = len(road)
+    new_road = [None] * length
+    flow_count = 0
+    diverted = 0
+    for i in range(length - 1, -1, -1):
+        if road[i] is not None:
+            v = road[i]
+            new_pos = i + v
+            if any(i < cell <= new_pos and random.random() < p_exit for cell, p_exit in off_ramps):
+                diverted += 1
+                continue
+            if new_pos >= length:
+                flow_count += 1
+                continue
+            new_road[new_pos] = v
+    return new_road, flow_count, diverted
+
+
+def poisson(rate):
+    """Losuje liczbę zdarzeń z rozkładu Poissona, korzystając z modułu random.
+    
+    Metoda Knutha - wystarczająca dla małych średnich (rzędu kilku pojazdów na krok).
+    
+    Args:
+        rate (float): Średnia liczba zdarzeń.
+    
+    Returns:
+        int: Wylosowana liczba zdarzeń.
+    """
+    threshold = math.exp(-rate)
+    k = 0
+    product = random.random()
+    while product > threshold:
+        k += 1
+        product *= random.random()
+    return k
+
+
+def init_boundary(length, n_lanes, inflow_rate=INFLOW_RATE, on_ramps=ON_RAMPS, off_ramps=OFF_RAMPS, arrivals=None,
+                  arrivals_end=INFLOW_DATA_END):
+    """Tworzy stan otwartych warunków brzegowych korytarza.
+    
+    Pojazdy czekające na wjazd oraz pojazdy opuszczające drogę trzymane są
+    w kolejkach (deque) obsługiwanych w czasie O(1), więc obsługa brzegów
+    nie wymaga przeglądania pasa.
+    
+    Args:
+        length (int): Długość drogi w komórkach.
+        n_lanes (int): Liczba pasów.
+        inflow_rate (float): Średnia liczba pojazdów wjeżdżających na krok (Poisson).
+        on_ramps (list[tuple]): Wjazdy jako pary (komórka, średnia liczba pojazdów na krok).
+        off_ramps (list[tuple]): Zjazdy jako pary (komórka, prawdopodobieństwo zjazdu).
+        arrivals (sequence, optional): Liczba przyjazdów w kolejnych krokach (np. z danych ExiD);
+            jeśli podana, zastępuje rozkład Poissona.
+        arrivals_end (str): Zachowanie po wyczerpaniu arrivals: 'loop' (od początku)
+            lub 'poisson' (rozkład Poissona z inflow_rate).
+    
+    Returns:
+        dict: Stan brzegów: kolejka wjazdowa, kolejki wjazdów, bufor cykliczny
+              wyjazdów (krok, pas) i licznik kroków.
+    
+    Raises:
+        ValueError: Gdy RAMP_LANE nie jest pasem drogi, gdy komórka wjazdu lub zjazdu
+            leży poza drogą (wjazd nie może też leżeć w komórce 0, zajętej przez wjazd
+            główny), gdy arrivals jest puste lub arrivals_end ma nieznaną wartość.
+    """
+    if not 0 <= RAMP_LANE < n_lanes:
+        raise ValueError(f"Pas wjazdów i zjazdów RAMP_LANE={RAMP_LANE} poza zakresem 0..{n_lanes - 1}")
+    for cell, _ in on_ramps:
+        if not 0 < cell < length:
+            raise ValueError(f"Komórka wjazdu {cell} poza zakresem 1..{length - 1}")
+    for cell, _ in off_ramps:
+        if not 0 < cell < length:
+            raise ValueError(f"Komórka zjazdu {cell} poza zakresem 1..{length - 1}")
+    if arrivals is not None and len(arrivals) == 0:
+        raise ValueError("Pusta lista przyjazdów z danych")
+    if arrivals_end not in ('loop', 'poisson'):
+        raise ValueError(f"Nieznane zachowanie po wyczerpaniu danych: {arrivals_end}")
+
+    return {
+        'inflow_rate': inflow_rate,
+        'arrivals': arrivals,
+        'arrivals_end': arrivals_end,
+        'entry': deque(),
+        'on_ramps': [(cell, rate, deque()) for cell, rate in on_ramps],
+        'off_ramps': list(off_ramps),
+        'exit': deque(maxlen=EXIT_LOG_SIZE),
+        't': 0,
+    }
+
+
+def inject_cars(road, boundary, v_max):
+    """Dodaje nowe pojazdy do kolejek wjazdowych i wpuszcza je na wolne komórki wjazdu.
+    
+    Na każdy pas na początku drogi oraz na każdy wjazd trafia co najwyżej
+    jeden pojazd na krok; pozostałe czekają w kolejce.
+    
+    Args:
+        road (list[list]): Stan drogi [pas][pozycja] (modyfikowany w miejscu).
+        boundary (dict): Stan brzegów utworzony przez init_boundary.
+        v_max (int): Maksymalna prędkość - prędkość pojazdów wjeżdżających z wolnej drogi.
+    """
+    t = boundary['t']
+    arrivals = boundary['arrivals']
+    if arrivals is not None and (t < len(arrivals) or boundary['arrivals_end'] == 'loop'):
+        n_new = arrivals[t % len(arrivals)]
+    else:
+        n_new = poisson(boundary['inflow_rate'])
+    boundary['entry'].extend([t] * int(n_new))
+
+    for lane in road:
+        if not boundary['entry']:
+            break
+        if lane[0] is None:
+            boundary['entry'].popleft()
+            lane[0] = v_max
+
+    ramp_lane = road[RAMP_LANE]
+    for cell, rate, ramp_queue in boundary['on_ramps']:
+        ramp_queue.extend([t] * poisson(rate))
+        if ramp_queue and ramp_lane[cell] is None:
+            ramp_queue.popleft()
+            ramp_lane[cell] = 0  # włączenie się do ruchu z prędkością 0
+
+
+def change_lane(road, lane, pos, v_max, p_change, v_strat_nasch, gap_rear_nasch, periodic=True):
     """
     Decyzja kierowcy o zmianie pasa ruchu zgodnie z rozszerzonym modelem NaSch-CL.
     
@@ -114,6 +261,7 @@ def change_lane(road, lane, pos, v_max, p_change, v_strat_nasch, gap_rear_nasch)
         p_change (float): Prawdopodobieństwo podjęcia decyzji o zmianie pasa.
         v_strat_nasch (float): Próg motywacji do zmiany pasa [komórki/krok].
         gap_rear_nasch (int): Minimalny bezpieczny dystans z tyłu [komórki].
+        periodic (bool): Czy droga jest pierścieniem.
 
     Returns:
         bool: True jeśli kierowca zmienia pas, False w przeciwnym wypadku.
@@ -122,13 +270,13 @@ def change_lane(road, lane, pos, v_max, p_change, v_strat_nasch, gap_rear_nasch)
     length = len(road[lane])
 
     # --- 1 MOTYWACJA DO ZMIANY PASA ---
-    gap_front = distance_to_next(road[lane], pos)       # Dystans do najbliższego pojazdu z przodu
-    max_v_possible = gap_front - 1                      # maksymalna prędkość możliwa na aktualnym pasie
+    gap_front = distance_to_next(road[lane], pos, periodic)  # Dystans do najbliższego pojazdu z przodu
+    max_v_possible = gap_front - 1                           # maksymalna prędkość możliwa na aktualnym pasie
 
     if v_max - max_v_possible < v_strat_nasch:
         return False  # Brak wystarczającej motywacji do zmiany pasa
 
-    gap_front_other = distance_to_next(road[other_lane], pos)
+    gap_front_other = distance_to_next(road[other_lane], pos, periodic)
     if gap_front_other - 1 <= max_v_possible + v_strat_nasch:
         return False  # Brak realnego zysku prędkości po zmianie pasa
 
@@ -139,6 +287,8 @@ def change_lane(road, lane, pos, v_max, p_change, v_strat_nasch, gap_rear_nasch)
     # --- 3 WARUNEK BEZPIECZEŃSTWA Z TYŁU ---
     distance_to_rear = 1
     while distance_to_rear < length:
+        if not periodic and pos - distance_to_rear < 0:
+            break  # Za początkiem otwartej drogi nie ma pojazdów
         behind_pos = (pos - distance_to_rear) % length
         v_rear = road[other_lane][behind_pos]
 
@@ -153,30 +303,38 @@ def change_lane(road, lane, pos, v_max, p_change, v_strat_nasch, gap_rear_nasch)
     return random.random() < p_change
 
 
-def step(road, v_max, p):
+def step(road, v_max, p, boundary=None, stats=None):
     """Wykonuje jeden krok czasowy symulacji NaSch dla wielu pasów (np. 2).
     
     Args:
         road (list[list]): Stan drogi [pas][pozycja].
         v_max (int): Maksymalna prędkość.
         p (float): Prawdopodobieństwo spowolnienia.
+        boundary (dict, optional): Stan otwartych brzegów z init_boundary;
+            None oznacza drogę zamkniętą w pierścień.
+        stats (dict, optional): Jeśli podany, zapisywana jest w nim pod kluczem
+            'lane_changes' liczba zmian pasa wykonanych z każdego pasa.
     
     Returns:
         tuple: (nowy stan drogi, łączny przepływ z wszystkich pasów)
     """
     n_lanes = len(road)
     length = len(road[0])
+    periodic = boundary is None
     
     new_road = []
     total_flow = 0
 
+    changes_per_lane = [0] * n_lanes
+
     # zmiana pasa
     if n_lanes > 1:
         lane_changes = []
         for lane in range(n_lanes):
             for pos in range(length):
                 if road[lane][pos] is not None:
-                    if change_lane(road, lane, pos, v_max, p_change=P_CHANGE, v_strat_nasch=V_STRAT, gap_rear_nasch=GAP_REAR):
+                    if change_lane(road, lane, pos, v_max, p_change=P_CHANGE, v_strat_nasch=V_STRAT, gap_rear_nasch=GAP_REAR,
+                                   periodic=periodic):
                         lane_changes.append((lane, pos))
 
         for lane, pos in lane_changes:
@@ -184,24 +342,38 @@ def step(road, v_max, p):
             if road[other][pos] is None:  # sprawdź czy nadal wolne
                 road[other][pos] = road[lane][pos]
                 road[lane][pos] = None
+                changes_per_lane[lane] += 1
+
+    if stats is not None:
+        stats['lane_changes'] = changes_per_lane
 
     # aktualizacja prędkości
     for lane in range(n_lanes):
-        updated_lane = update_speeds(road[lane], v_max, p)
+        updated_lane = update_speeds(road[lane], v_max, p, periodic)
         new_road.append(updated_lane)
 
     # przesunięcie samochodów
     moved_road = []
     for lane in range(n_lanes):
-        moved_lane, flow_count = move_cars(new_road[lane])
+        if periodic:
+            moved_lane, flow_count = move_cars(new_road[lane])
+        else:
+            off_ramps = boundary['off_ramps'] if lane == RAMP_LANE else ()
+            moved_lane, flow_count, diverted = move_cars_open(new_road[lane], off_ramps)
+            boundary['exit'].extend([(boundary['t'], lane)] * (flow_count + diverted))
         moved_road.append(moved_lane)
         total_flow += flow_count
 
+    # wjazd nowych pojazdów na otwarty korytarz
+    if not periodic:
+        inject_cars(moved_road, boundary, v_max)
+        boundary['t'] += 1
+
     return moved_road, total_flow
 
 
 
-def run_simulation(steps, length, density, v_max, p):
+def run_simulation(steps, length, density, v_max, p, boundary=None, on_step=None, keep_history=True):
     """Uruchamia pełną symulację NaSch na określoną liczbę kroków.
     
     Args:
@@ -210,15 +382,25 @@ def run_simulation(steps, length, density, v_max, p):
         density (float): Początkowa gęstość pojazdów.
         v_max (int): Maksymalna prędkość.
         p (float): Prawdopodobieństwo spowolnienia.
+        boundary (dict, optional): Stan otwartych brzegów z init_boundary (None = pierścień).
+        on_step (callable, optional): Funkcja wywoływana po każdym kroku jako
+            on_step(road, stats), gdzie stats zawiera 'lane_changes' z funkcji step.
+        keep_history (bool): Czy zapamiętywać stan drogi w każdym kroku; przy długich
+            przebiegach (np. z eksportem) warto wyłączyć.
     
     Returns:
-        tuple: (historia stanów drogi, lista przepływów w kolejnych krokach)
+        tuple: (historia stanów drogi (pusta, gdy keep_history=False),
+                lista przepływów w kolejnych krokach)
     """
     road = init_road(length, density, n_lanes=LANES)
     history = []
     point_flows = []
+    stats = {} if on_step is not None else None
     for _ in range(steps):
-        history.append([lane.copy() for lane in road])
-        road, flow_count = step(road, v_max, p)
+        if keep_history:
+            history.append([lane.copy() for lane in road])
+        road, flow_count = step(road, v_max, p, boundary, stats)
         point_flows.append(flow_count)
+        if on_step is not None:
+            on_step(road, stats)
     return history, point_flows
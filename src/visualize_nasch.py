@@ -2,8 +2,9 @@ import matplotlib.pyplot as plt
 import pygame 
 import numpy as np
 
-from src.nasch_core import run_simulation, init_road, step
-from src.config import L, LANES
+from src.nasch_core import run_simulation, init_road, init_boundary, step
+from src.exid_replay import get_frame
+from src.config import L, LANES, REPLAY_FPS, BOUNDARY, TIME_STEP_S, EXID_FRAME_RATE
 
 # --- WIZUALIZACJA (PYGAME) ---
 CELL_SIZE = 10                    # Rozmiar pojedynczej komórki (piksele)
@@ -16,6 +17,7 @@ SCREEN_WIDTH = ROAD_WIDTH + 50    # Szerokość całego okna
 CAR_COLOR = (255, 255, 255)       
 BG_COLOR = (0, 0, 0)              
 ROAD_COLOR = (50, 50, 50)   
+REPLAY_COLOR = (40, 40, 70)       # Tło pasa z odtwarzanymi danymi ExiD
 
 
 def get_car_color(v, v_max):
@@ -38,7 +40,7 @@ def get_car_color(v, v_max):
     return (red, green, 0)
 
 
-def run_pygame_simulation(initial_density, v_max, p, steps_per_second=10):
+def run_pygame_simulation(initial_density, v_max, p, steps_per_second=10, replay=None, arrivals=None):
     """Uruchamia dynamiczną symulację NaSch w oknie Pygame.
     
     Args:
@@ -46,6 +48,9 @@ def run_pygame_simulation(initial_density, v_max, p, steps_per_second=10):
         v_max (int): Maksymalna prędkość.
         p (float): Prawdopodobieństwo losowego spowolnienia.
         steps_per_second (int): Szybkość symulacji w FPS.
+        replay (dict, optional): Indeks klatek ExiD z exid_replay.load_replay, rysowany
+            pod symulacją w tej samej skali czasu co symulacja (krok = TIME_STEP_S).
+        arrivals (sequence, optional): Napływ z danych dla otwartego korytarza (BOUNDARY = 'open').
     """
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -53,11 +58,16 @@ def run_pygame_simulation(initial_density, v_max, p, steps_per_second=10):
     clock = pygame.time.Clock()
     
     road = init_road(L, initial_density, n_lanes=LANES)
+    boundary = init_boundary(L, LANES, arrivals=arrivals) if BOUNDARY == 'open' else None
     font = pygame.font.Font(None, 24)
     
     running = True
     paused = False
     total_steps = 0
+    flow_count = 0
+    last_step_ms = pygame.time.get_ticks()
+    elapsed_ms = 0
+    replay_frame = None
 
     center_x = SCREEN_WIDTH // 2
 
@@ -114,10 +124,28 @@ def run_pygame_simulation(initial_density, v_max, p, steps_per_second=10):
                     paused = not paused
 
         if not paused:
-            road, flow_count = step(road, v_max, p)
-            total_steps += 1
+            if replay is None:
+                road, flow_count = step(road, v_max, p, boundary)
+                total_steps += 1
+            else:
+                # pętla działa z REPLAY_FPS; kroki symulacji planowane są co 1000 / steps_per_second ms,
+                # w razie potrzeby kilka w jednej klatce
+                now_ms = pygame.time.get_ticks()
+                step_ms = 1000 / steps_per_second
+                if now_ms - last_step_ms > 1000:
+                    last_step_ms = now_ms - step_ms  # nie nadrabiamy dłuższych przestojów
+                while now_ms - last_step_ms >= step_ms:
+                    road, flow_count = step(road, v_max, p, boundary)
+                    total_steps += 1
+                    last_step_ms += step_ms
+
+                # nagranie przesuwa się o TIME_STEP_S sekund na wykonany krok, z interpolacją między krokami
+                step_progress = total_steps + (now_ms - last_step_ms) / step_ms
+                replay_pos = int(step_progress * TIME_STEP_S * EXID_FRAME_RATE)
+                replay_frame = get_frame(replay, replay_pos % len(replay['starts']))
         else:
             flow_count = 0
+            last_step_ms += elapsed_ms  # pauza nie przesuwa harmonogramu kroków
         
         screen.fill(BG_COLOR)
         pygame.draw.rect(screen, ROAD_COLOR, (25, 50, ROAD_WIDTH, ROAD_HEIGHT))
@@ -128,6 +156,8 @@ def run_pygame_simulation(initial_density, v_max, p, steps_per_second=10):
             f"Krok: {total_steps} | Gęstość K: {initial_density:.3f} | "
             f"V_max: {v_max} | P: {p:.2f} | Przepływ Q: {flow_count * steps_per_second:.1f} Veh/s"
         )
+        if boundary is not None:
+            text_info += f" | Kolejka wjazdowa: {len(boundary['entry'])}"
         text_render = font.render(text_info, True, CAR_COLOR)
         screen.blit(text_render, (25, 10))
 
@@ -139,11 +169,24 @@ def run_pygame_simulation(initial_density, v_max, p, steps_per_second=10):
                     color = get_car_color(v, v_max)
                     pygame.draw.rect(
                         screen, color, (x_pos + 1, y_pos + 1, CELL_SIZE - 2, ROAD_HEIGHT - 2))
+
+        if replay is not None:
+            y_pos = 50 + 2 * (ROAD_HEIGHT + 5)
+            pygame.draw.rect(screen, REPLAY_COLOR, (25, y_pos, ROAD_WIDTH, ROAD_HEIGHT))
+            if replay_frame is not None:
+                frame_id, cells, speeds = replay_frame
+                for cell, v in zip(cells.tolist(), speeds.tolist()):
+                    x_pos = 25 + cell * CELL_SIZE
+                    color = get_car_color(min(v, v_max), v_max)
+                    pygame.draw.rect(
+                        screen, color, (x_pos + 1, y_pos + 1, CELL_SIZE - 2, ROAD_HEIGHT - 2))
+                frame_render = font.render(f"ExiD klatka: {frame_id}", True, CAR_COLOR)
+                screen.blit(frame_render, (25, y_pos + ROAD_HEIGHT + 5))
                 
         draw_buttons()
 
         pygame.display.flip()
-        clock.tick(steps_per_second)
+        elapsed_ms = clock.tick(REPLAY_FPS if replay is not None else steps_per_second)
     pygame.quit()
 
 
@@ -180,9 +223,11 @@ def history_to_array(history):
     return np.array(all_rows, dtype=int)
 
 
-def run_full_visualization(v_max, p, density):
+def run_full_visualization(v_max, p, density, replay=None, arrivals=None):
     print("Uruchamianie wizualizacji...")
-    run_pygame_simulation(initial_density=density, v_max=v_max, p=p, steps_per_second=10)
-    history, _ = run_simulation(steps=300, length=133, density=density, v_max=v_max, p=p)
+    run_pygame_simulation(initial_density=density, v_max=v_max, p=p, steps_per_second=10, replay=replay,
+                          arrivals=arrivals)
+    boundary = init_boundary(133, LANES, arrivals=arrivals) if BOUNDARY == 'open' else None
+    history, _ = run_simulation(steps=300, length=133, density=density, v_max=v_max, p=p, boundary=boundary)
     arr = history_to_array(history)
     plot_heatmap(arr, v_max, p)